@@ -8,6 +8,8 @@ import signal
 import zipfile
 import os
 import shutil
+import gzip
+import tempfile
 from dotenv import load_dotenv
 import urllib.request
 import urllib.error
@@ -20,9 +22,19 @@ ACCESS_PORT = 80
 REMOTE_USER = "ec2-user"
 REMOTE_HOST = "3.129.121.42"
 KEY_PATH = "PersonalServerKey.pem"
+# Reuse a single SSH connection across every ssh/rsync/scp invocation
+SSH_CONTROL_DIR = os.path.expanduser("~/.ssh")
+SSH_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", f"ControlPath={SSH_CONTROL_DIR}/cm-%r@%h:%p",
+    "-o", "ControlPersist=600"
+]
 REMOTE_DIR = f"/home/{REMOTE_USER}/"
 REMOTE_SITE_DIR = f"/home/{REMOTE_USER}/site/"
 LOCAL_SITE_DIR = "site"
+COPY_BUFFER_SIZE = 1 << 20  # 1 MiB
+# Resource types served pre-gzipped by the server
+PRECOMPRESS_EXTENSIONS = (".css", ".js")
 
 # Webserver Files/Folders to sync
 LOCAL_FILES = [
@@ -35,6 +47,7 @@ LOCAL_FILES = [
 load_dotenv()
 ADMIN_USER = os.getenv("ADMIN_USER")
 ADMIN_PASS = os.getenv("ADMIN_PASS")
+X_ACCEL_REDIRECT = os.getenv("X_ACCEL_REDIRECT", "false")
 
 # --- Helper Functions ---
 
@@ -49,7 +62,15 @@ def run_command(command, shell=False, suppress_output=False):
 
 def get_ssh_base_cmd():
     """Returns the base SSH command list with key."""
-    return ["ssh", "-i", KEY_PATH, f"{REMOTE_USER}@{REMOTE_HOST}"]
+    return ["ssh", "-i", KEY_PATH] + SSH_OPTIONS + [f"{REMOTE_USER}@{REMOTE_HOST}"]
+
+def get_rsync_ssh_arg():
+    """Returns the remote shell string for rsync's -e option."""
+    return " ".join(["ssh", "-i", KEY_PATH] + SSH_OPTIONS)
+
+def ensure_ssh_control_dir():
+    """Creates the directory holding the SSH multiplexing sockets."""
+    os.makedirs(SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
 
 def sigint_handler(signal, frame):
     """Handles the SIGINT signal (Ctrl-C) gracefully."""
@@ -103,6 +124,52 @@ def install_requirements(remote=False, venv_pip=None):
         subprocess.run(command, check=False)
         print("Local requirements installed.")
 
+def extract_zip(zip_file_path, dest_dir):
+    """Extracts a zip file into dest_dir, streaming each member through a large buffer."""
+    dest_root = os.path.realpath(dest_dir)
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        # Resolve targets, skipping members that would land outside dest_dir
+        members = []
+        for info in zip_ref.infolist():
+            dest_path = os.path.realpath(os.path.join(dest_root, info.filename))
+            if os.path.commonpath([dest_root, dest_path]) == dest_root:
+                members.append((info, dest_path))
+
+        # Create every unique directory up front in one pass
+        dirs = {dest_path if info.is_dir() else os.path.dirname(dest_path)
+                for info, dest_path in members}
+        for dir_path in sorted(dirs):
+            os.makedirs(dir_path, exist_ok=True)
+
+        # Directory entries need no further work
+        for info, dest_path in members:
+            if info.is_dir():
+                continue
+            with zip_ref.open(info) as src, open(dest_path, 'wb', buffering=COPY_BUFFER_SIZE) as dst:
+                shutil.copyfileobj(src, dst, length=COPY_BUFFER_SIZE)
+
+def precompress_resources():
+    """Writes a gzip -9 copy next to each CSS/JS resource that changed since its last one."""
+    for root, _, files in os.walk("resources"):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            src_path = os.path.join(root, name)
+            gz_path = src_path + ".gz"
+            if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(src_path):
+                continue
+            # Write beside the target and swap it in, so an interrupted run never
+            # leaves a truncated .gz that looks newer than its source
+            tmp_path = gz_path + ".tmp"
+            try:
+                with open(src_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=9) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, gz_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
 # --- Command Functions ---
 
 def update_systemd_service():
@@ -123,7 +190,8 @@ WorkingDirectory={REMOTE_DIR}
 Environment="PATH={REMOTE_DIR}.venv/bin"
 Environment="ADMIN_USER={ADMIN_USER}"
 Environment="ADMIN_PASS={ADMIN_PASS}"
-ExecStart={REMOTE_DIR}.venv/bin/gunicorn --workers 3 --bind 127.0.0.1:{SERVER_PORT} server.server:app
+Environment="X_ACCEL_REDIRECT={X_ACCEL_REDIRECT}"
+ExecStart={REMOTE_DIR}.venv/bin/gunicorn --config {REMOTE_DIR}server/gunicorn.conf.py --bind 127.0.0.1:{SERVER_PORT} server.server:app
 Restart=always
 
 [Install]
@@ -137,7 +205,7 @@ WantedBy=multi-user.target
 
     # SCP the file to the remote user's home dir (cannot scp directly to /etc)
     rsync_cmd = [
-        "scp", "-i", KEY_PATH,
+        "scp", "-i", KEY_PATH, *SSH_OPTIONS,
         local_temp_path,
         f"{REMOTE_USER}@{REMOTE_HOST}:{REMOTE_DIR}{service_name}"
     ]
@@ -167,6 +235,7 @@ def local_start():
     venv_python, venv_pip = ensure_local_venv()
     install_requirements(remote=False, venv_pip=venv_pip)
     local_kill()
+    precompress_resources()
     print("Starting local server...")
     run_command([venv_python, "server/server.py", str(LOCAL_PORT)])
 
@@ -193,16 +262,16 @@ def server_deploy():
     run_command(ssh_cmd)
 
     # Sync local files
+    precompress_resources()
     print("Transferring files with rsync...")
-    for file_name in LOCAL_FILES:
-        rsync_cmd = [
-            "rsync", "-r", "-a", "-z",
-            "-e", f"ssh -i {KEY_PATH}",
-            file_name,
-            f"{REMOTE_USER}@{REMOTE_HOST}:{REMOTE_DIR}"
-        ]
-        run_command(rsync_cmd)
-    
+    rsync_cmd = [
+        "rsync", "-r", "-a", "-z",
+        "-e", get_rsync_ssh_arg(),
+        *LOCAL_FILES,
+        f"{REMOTE_USER}@{REMOTE_HOST}:{REMOTE_DIR}"
+    ]
+    run_command(rsync_cmd)
+
     print("File transfer complete.")
 
     install_requirements(remote=True)
@@ -235,48 +304,57 @@ def deploy_site_local(zip_file_path):
     os.makedirs(LOCAL_SITE_DIR, exist_ok=False)
     
     try:
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(LOCAL_SITE_DIR)
+        extract_zip(zip_file_path, LOCAL_SITE_DIR)
         print("Extraction successful.")
     except Exception as e:
         print(f"Error during local extraction: {e}")
         sys.exit(1)
 
+def stream_dir_remote(local_dir, remote_commands):
+    """Pipes a gzipped tar of local_dir into the stdin of a remote command."""
+    tar_proc = subprocess.Popen(["tar", "cz", "-C", local_dir, "."], stdout=subprocess.PIPE)
+    ssh_cmd = get_ssh_base_cmd()
+    ssh_cmd.append(remote_commands)
+    ssh_proc = subprocess.Popen(ssh_cmd, stdin=tar_proc.stdout)
+    # Close our copy so tar gets SIGPIPE if ssh exits early
+    tar_proc.stdout.close()
+    ssh_returncode = ssh_proc.wait()
+    tar_returncode = tar_proc.wait()
+    if tar_returncode != 0 or ssh_returncode != 0:
+        print(f"Error streaming {local_dir}: tar exited {tar_returncode}, ssh exited {ssh_returncode}")
+        sys.exit(1)
+
 def deploy_site_remote(zip_file_path):
-    """Transfers the specified zip file to the remote server and extracts its contents into site/"""
+    """Streams the specified zip file (or directory) contents to the remote server's site/ directory"""
     if not os.path.exists(zip_file_path):
         print(f"Error: Zip file not found at {zip_file_path}")
         sys.exit(1)
 
-    remote_temp_path = os.path.join(REMOTE_DIR, os.path.basename(zip_file_path))
-    
     print(f"Deploying {zip_file_path} to remote server and extracting to {REMOTE_SITE_DIR}")
 
-    # Transfer the ZIP file using rsync
-    print("Transferring zip file...")
-    rsync_cmd = [
-        "rsync", "-a", "-z",
-        "-e", f"ssh -i {KEY_PATH}",
-        zip_file_path,
-        f"{REMOTE_USER}@{REMOTE_HOST}:{REMOTE_DIR}"
-    ]
-    run_command(rsync_cmd)
-    
-    # Execute remote commands
-    print("Extracting contents remotely...")
     remote_commands = (
         # Delete current contents
         f"rm -rf {REMOTE_SITE_DIR} && "
         # Ensure the 'site' extraction directory exists
         f"mkdir -p {REMOTE_SITE_DIR} && "
-        # Unzip the temporary file into the 'site' directory, overwriting existing files
-        f"unzip -o {remote_temp_path} -d {REMOTE_SITE_DIR} && "
-        # Clean up the temporary zip file
-        f"rm {remote_temp_path}"
+        # Extract the tar stream arriving on stdin into the 'site' directory
+        f"tar xz -C {REMOTE_SITE_DIR}"
     )
-    ssh_cmd = get_ssh_base_cmd()
-    ssh_cmd.append(remote_commands)
-    run_command(ssh_cmd)
+
+    # A directory can be streamed as-is, a zip is unpacked locally first
+    if os.path.isdir(zip_file_path):
+        print("Streaming site directory...")
+        stream_dir_remote(zip_file_path, remote_commands)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            print("Unpacking zip file locally...")
+            try:
+                extract_zip(zip_file_path, temp_dir)
+            except Exception as e:
+                print(f"Error during local extraction: {e}")
+                sys.exit(1)
+            print("Streaming site contents...")
+            stream_dir_remote(temp_dir, remote_commands)
 
     print("Remote site deployment complete.")
 
@@ -298,12 +376,14 @@ def main():
     parser_local_site.add_argument("zip_file_path", help="Path to the ZIP file.")
 
     # server-site
-    parser_server_site = subparsers.add_parser("server-site", help="Transfer specified ZIP file to remote and extract into remote 'site' directory.")
-    parser_server_site.add_argument("zip_file_path", help="Path to the ZIP file.")
+    parser_server_site = subparsers.add_parser("server-site", help="Stream specified ZIP file (or directory) contents into remote 'site' directory.")
+    parser_server_site.add_argument("zip_file_path", help="Path to the ZIP file or site directory.")
 
 
     args = parser.parse_args()
 
+    ensure_ssh_control_dir()
+
     # Execution logic based on action
     if args.action == "local":
         local_start()
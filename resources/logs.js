@@ -1,5 +1,8 @@
 let currentLogType = 'requests'; 
 
+// Last fetched log contents, extended with Range requests when the file grows
+let loadedLog = { path: null, text: '', size: 0 };
+
 function scrollToBottom() {
     const logContainer = document.getElementById('log-display');
     if (logContainer) {
@@ -38,6 +41,8 @@ function switchTab(type) {
 
 /**
  * Fetches and displays the contents of the currently selected log file.
+ * If the same file was loaded before, only the bytes appended since are requested,
+ * starting one byte early so the newline ending our copy confirms it is the same file.
  */
 async function fetchAndDisplayLogs() {
     const logDisplayElement = document.getElementById('log-display');
@@ -48,23 +53,44 @@ async function fetchAndDisplayLogs() {
         : '/api/logs/requests.log';
 
     try {
-        const response = await fetch(filePath);
+        const incremental = loadedLog.path === filePath && loadedLog.size > 0;
+        const headers = incremental ? { 'Range': `bytes=${loadedLog.size - 1}-` } : {};
+        const response = await fetch(filePath, { headers });
+
+        if (response.status === 416) {
+            // The file is now shorter than our copy, so it was archived: reload it whole
+            loadedLog = { path: null, text: '', size: 0 };
+            return fetchAndDisplayLogs();
+        }
 
         if (!response.ok) {
             // Check for 404 specifically, which often means the file hasn't been created yet
             if (response.status === 404) {
+                loadedLog = { path: null, text: '', size: 0 };
                 logDisplayElement.innerHTML = '<span class="log-message">No log file found (File empty).</span>';
                 return;
             }
             throw new Error(`Failed to fetch log file: HTTP status ${response.status}`);
         }
 
-        const logContent = await response.text();
+        const buffer = await response.arrayBuffer();
+        if (response.status === 206) {
+            const bytes = new Uint8Array(buffer);
+            if (bytes[0] !== 0x0A) {
+                // Archived and regrown past our copy: the old text no longer lines up
+                loadedLog = { path: null, text: '', size: 0 };
+                return fetchAndDisplayLogs();
+            }
+            loadedLog.text += new TextDecoder().decode(bytes.subarray(1));
+            loadedLog.size += bytes.length - 1;
+        } else {
+            loadedLog = { path: filePath, text: new TextDecoder().decode(buffer), size: buffer.byteLength };
+        }
 
-        if (logContent.trim() === '') {
+        if (loadedLog.text.trim() === '') {
             logDisplayElement.innerHTML = '<span class="log-message">The log file is currently empty.</span>';
         } else {
-            logDisplayElement.textContent = logContent;
+            logDisplayElement.textContent = loadedLog.text;
         }
         scrollToBottom();
 
@@ -149,6 +175,9 @@ function archiveLogs() {
     const typeLabel = currentLogType === 'requests' ? 'Request' : 'Error';
     if(!confirm(`This will download the current ${typeLabel} log file and then clear it from the server. Continue?`)) return;
     
+    // The log is emptied, so the next view must be a full fetch
+    loadedLog = { path: null, text: '', size: 0 };
+
     // Redirect with type param to trigger archive/download on the server
     window.location.href = `/api/logs/archive?type=${currentLogType}`;
     
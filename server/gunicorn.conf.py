@@ -0,0 +1,11 @@
+# Gunicorn settings for the production server (bind address is passed by deploy.py)
+# Kept at 3 processes: each one runs its own log writer, GeoIP batch thread
+# and cache, and they all share ip-api's per-IP rate limit
+workers = 3
+
+# Threaded workers so slow requests don't block others on the same worker
+worker_class = "gthread"
+threads = 4
+
+# Hold idle connections from Nginx open for reuse
+keepalive = 30
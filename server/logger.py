@@ -1,9 +1,15 @@
+import atexit
 import datetime
+import functools
+import queue
+import re
 import sys
+import threading
+import time
 import requests
 import os
+from collections import OrderedDict
 from typing import Dict, Any
-from urllib.parse import urlparse
 from user_agents import parse
 
 # --- Configuration ---
@@ -12,20 +18,55 @@ PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
 LOG_FILE = os.path.join(PROJECT_ROOT, "logs/requests.log")
 LOG_OVERFLOW = os.path.join(PROJECT_ROOT, "logs/requests_overflow.log")
 ERROR_LOG_FILE = os.path.join(PROJECT_ROOT, "logs/errors.log")
-GEO_IP_API = "http://ip-api.com/json/{ip}?fields=country,regionName,city"
+GEO_IP_BATCH_API = "http://ip-api.com/batch?fields=country,regionName,city,query"
 LOG_FORMAT = "[{timestamp}] [{ip}] [{country}/{region}/{city}] [Referrer: {referrer}] [{method}] {url} | Agent: {user_agent}"
 MAX_RETURN = 1000
+SEARCH_BLOCK_SIZE = 64 * 1024  # 64 KB
+SEARCH_PATTERN_CACHE_SIZE = 128
+GEO_CACHE_SIZE = 4096
+FILTER_CACHE_SIZE = 2048
+GEO_BATCH_SIZE = 100  # Max IPs per batch request
+GEO_BATCH_INTERVAL = 4  # Min seconds between batch requests from one worker
+GEO_RATE_LIMIT_PAUSE = 60  # Fallback pause when rate limited without an X-Ttl header
+GEO_TIMEOUT = 2
+GEO_WAIT_TIMEOUT = 0.5  # How long the log writer waits for a batch of lookups
 MAX_LOG_SIZE = 40 * 1024 * 1024  # 40 MB in bytes
 MAX_OVERFLOW_SIZE = 5 * 1024 * 1024 * 1024 # 5 GB in bytes
+LOG_WRITE_BUFFER_SIZE = 1024 * 1024  # 1 MB
+LOG_QUEUE_SIZE = 10000  # Lines beyond this are dropped rather than blocking requests
+LOG_FLUSH_INTERVAL = 1  # Max seconds between flushing buffered lines to disk
 
 STATIC_ASSET_EXTENSIONS = (
     '.css', '.js', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico', 
     '.woff', '.woff2', '.ttf', '.otf', '.eot', '.map', '.json', '.txt'
 )
+# Matches any of the extensions above at the end of a path, ignoring case
+STATIC_ASSET_RE = re.compile(
+    r"\.(?:" + "|".join(re.escape(ext[1:]) for ext in STATIC_ASSET_EXTENSIONS) + r")\Z",
+    re.IGNORECASE
+)
 
-IGNORED_ROUTES = [
+IGNORED_ROUTES = frozenset({
     '/logs'
-]
+})
+
+# GeoIP state: results are cached per IP, unresolved IPs are queued for
+# the batch worker (a list per caller) and waiters are woken through a per-IP event
+_geo_session = requests.Session()
+_geo_cache = OrderedDict()
+_geo_pending = {}
+_geo_queue = queue.Queue()
+_geo_lock = threading.Lock()
+_geo_worker = None
+
+# Log lines are queued by the serving threads and written by a single
+# background thread through handles that stay open between writes
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_dropped_lock = threading.Lock()
+_dropped_lines = 0
+_log_writer_lock = threading.Lock()
+_log_writer = None
+_log_files = {}
 
 def get_log_file_path(log_type):
     """Helper to select the correct file based on type."""
@@ -36,41 +77,125 @@ def get_log_file_path(log_type):
 def get_log_size(log_type='requests'):
     """Returns the size of the specified log file in bytes"""
     target_file = get_log_file_path(log_type)
-    if os.path.exists(target_file):
-        return os.path.getsize(target_file)
+    try:
+        return os.stat(target_file).st_size
+    except FileNotFoundError:
+        return 0
+
+def read_blocks_reversed(f, start=0, end=None):
+    """
+    Yields (offset, block) pairs of whole lines between start and end of a binary file, last block first.
+    Blocks are read SEARCH_BLOCK_SIZE bytes at a time; lines keep file order within a block.
+    A line cut off by start is skipped.
+    """
+    file_size = f.seek(0, os.SEEK_END)
+    position = file_size if end is None else min(end, file_size)
+    start = min(max(start, 0), position)
+    if position > start:
+        # Ignore the newline terminating the last line
+        f.seek(position - 1)
+        if f.read(1) == b'\n':
+            position -= 1
+
+    # A window starting right after a newline begins with a whole line
+    starts_on_line = start == 0
+    if not starts_on_line:
+        f.seek(start - 1)
+        starts_on_line = f.read(1) == b'\n'
+
+    carry = b''
+    while position > start:
+        read_size = min(SEARCH_BLOCK_SIZE, position - start)
+        position -= read_size
+        f.seek(position)
+        block = f.read(read_size) + carry
+        if position > start or not starts_on_line:
+            # The text before the first newline may continue in an earlier block
+            newline = block.find(b'\n')
+            if newline < 0:
+                carry = block
+                continue
+            carry = block[:newline]
+            yield position + newline + 1, block[newline + 1:]
+        else:
+            yield position, block
+
+def find_line_start(f, position):
+    """Returns the start of the line that position falls in (position itself if a line starts there)."""
+    while position > 0:
+        read_size = min(SEARCH_BLOCK_SIZE, position)
+        f.seek(position - read_size)
+        newline = f.read(read_size).rfind(b'\n')
+        if newline >= 0:
+            return position - read_size + newline + 1
+        position -= read_size
     return 0
 
-def search_logs(term, log_type='requests') -> Dict[str, Any]:
-    """Filters log lines containing the term from the specified file."""
+@functools.lru_cache(maxsize=SEARCH_PATTERN_CACHE_SIZE)
+def compile_search_term(term):
+    """
+    Returns a function telling whether UTF-8 bytes contain term, ignoring case.
+    ASCII terms match the raw bytes; others decode and casefold so that e.g.
+    "zürich" still finds "Zürich".
+    """
+    if term.isascii():
+        return re.compile(re.escape(term.encode('utf-8')), re.IGNORECASE).search
+    folded = term.casefold()
+    return lambda data: folded in data.decode('utf-8', errors='replace').casefold()
+
+def search_logs(term, log_type='requests', tail=None, offset=None) -> Dict[str, Any]:
+    """
+    Filters log lines containing the term from the specified file, newest first.
+    Scans back from offset (default: end of file) over the last tail bytes (default: all).
+    Both ends are moved to line starts: a line containing offset is left for the
+    next page and a line cut by tail is read whole, so next_offset is always a line
+    start to resume from for older lines; 0 means the whole file was scanned.
+    """
     target_file = get_log_file_path(log_type)
+    matches = compile_search_term(term)
     results = []
-    if os.path.exists(target_file):
-        with open(target_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            # Iterate in reverse to show newest logs first
-            for line in reversed(lines): 
-                if term.lower() in line.lower():
-                    results.append(line.strip())
-                    if len(results) >= MAX_RETURN: 
-                        break
-    return {'results': results, 'count': len(results)}
+    try:
+        f = open(target_file, 'rb')
+    except FileNotFoundError:
+        return {'results': results, 'count': 0, 'next_offset': 0}
+    with f:
+        file_size = f.seek(0, os.SEEK_END)
+        end = file_size if offset is None else min(max(offset, 0), file_size)
+        if end < file_size:
+            end = find_line_start(f, end)
+        start = 0 if tail is None else find_line_start(f, max(end - max(tail, 0), 0))
+        next_offset = start
+        for block_offset, block in read_blocks_reversed(f, start, end):
+            next_offset = block_offset
+            # Skip blocks without a match before splitting them into lines
+            if not matches(block):
+                continue
+            line_end = len(block)
+            for line in reversed(block.split(b'\n')):
+                line_start = line_end - len(line)
+                if matches(line):
+                    results.append(line.decode('utf-8', errors='replace').strip())
+                    if len(results) >= MAX_RETURN:
+                        return {'results': results, 'count': len(results),
+                                'next_offset': block_offset + line_start}
+                line_end = line_start - 1
+    return {'results': results, 'count': len(results), 'next_offset': next_offset}
 
 
 def log_error_to_file(message):
-    """Writes a timestamped message to the dedicated error log file."""
-    if os.path.getsize(ERROR_LOG_FILE) >= MAX_LOG_SIZE:
-        return
+    """Queues a timestamped message for the dedicated error log file."""
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {message}"
-    with open(ERROR_LOG_FILE, 'a') as f:
-        f.write(log_entry + "\n")
+    enqueue_log('error', log_entry)
 
+@functools.lru_cache(maxsize=FILTER_CACHE_SIZE)
 def is_static_asset(url_path):
     """Checks if a request is for a static asset based on the file extension."""
-    path = urlparse(url_path).path
+    # Strip the query string and fragment; url_path is never a full URL
+    path = url_path.split('?', 1)[0].split('#', 1)[0]
     
     # Check if the path ends with one of the defined static asset extensions
-    if path.lower().endswith(STATIC_ASSET_EXTENSIONS):
+    if STATIC_ASSET_RE.search(path):
         return True
     
     # Also check for common routes that don't serve full pages but aren't files (e.g., favicon)
@@ -79,6 +204,7 @@ def is_static_asset(url_path):
         
     return False
 
+@functools.lru_cache(maxsize=FILTER_CACHE_SIZE)
 def is_bot(user_agent_string):
     """Checks if a request is likely from a bot/crawler based on the User-Agent header."""
     if not user_agent_string:
@@ -96,43 +222,146 @@ def is_bot(user_agent_string):
         
     return False
 
-def get_geolocation(ip_address):
+def get_rate_limit_delay(response):
     """
-    Attempts to get location data for a given IP address.
-    NOTE: Currently rate limited to 45/min, do batch lookup to increase
+    Returns how many seconds to wait before the next batch request.
+    The 15/min limit is per server IP and shared by every gunicorn worker, so
+    this follows ip-api's X-Rl (requests left) and X-Ttl (seconds to reset) headers.
     """
-    if ip_address in ('127.0.0.1', 'localhost'):
-        return "N/A", "N/A", "N/A" # localhost/testing
-        
     try:
-        response = requests.get(GEO_IP_API.format(ip=ip_address), timeout=0.5)
-        response.raise_for_status()
-        data = response.json()
-        
+        remaining = int(response.headers.get('X-Rl', 1))
+        reset = int(response.headers.get('X-Ttl', GEO_RATE_LIMIT_PAUSE))
+    except ValueError:
+        remaining, reset = 0, GEO_RATE_LIMIT_PAUSE
+    if response.status_code == 429 or remaining <= 0:
+        return max(reset, GEO_BATCH_INTERVAL)
+    return GEO_BATCH_INTERVAL
+
+def fetch_geolocation_batch(ip_addresses):
+    """
+    Looks up a batch of IPs with one API request.
+    Returns ({ip: (country, region, city)}, seconds to wait before the next request).
+    """
+    payload = [{'query': ip} for ip in ip_addresses]
+    response = _geo_session.post(GEO_IP_BATCH_API, json=payload, timeout=GEO_TIMEOUT)
+    delay = get_rate_limit_delay(response)
+    if response.status_code == 429:
+        log_error_to_file(f"GeoIP rate limited, pausing lookups for {delay}s")
+        return {}, delay
+    response.raise_for_status()
+
+    results = {}
+    for data in response.json():
         country = data.get('country', 'Unknown')
         region = data.get('regionName', 'Unknown')
         city = data.get('city', 'Unknown')
-        
-        return country, region, city
-        
-    except requests.RequestException as e:
-        log_error_to_file(f"GeoIP failed for {ip_address}: {e}")
-        return "GeoIP-Failed", "GeoIP-Failed", "GeoIP-Failed"
+        results[data.get('query')] = (country, region, city)
+    return results, delay
+
+def geolocation_batch_worker():
+    """Drains queued IPs in batches of up to GEO_BATCH_SIZE and caches the results."""
+    pending = []
+    while True:
+        if not pending:
+            pending = _geo_queue.get()
+        while len(pending) < GEO_BATCH_SIZE:
+            try:
+                pending += _geo_queue.get_nowait()
+            except queue.Empty:
+                break
+        batch, pending = pending[:GEO_BATCH_SIZE], pending[GEO_BATCH_SIZE:]
+
+        results = {}
+        delay = GEO_BATCH_INTERVAL
+        try:
+            results, delay = fetch_geolocation_batch(batch)
+        except (requests.RequestException, ValueError) as e:
+            log_error_to_file(f"GeoIP batch failed for {len(batch)} IPs: {e}")
+
+        with _geo_lock:
+            for ip in batch:
+                if ip in results:
+                    _geo_cache[ip] = results[ip]
+                    if len(_geo_cache) > GEO_CACHE_SIZE:
+                        _geo_cache.popitem(last=False)
+                event = _geo_pending.pop(ip, None)
+                if event is not None:
+                    event.set()
+
+        # Stay under the batch endpoint's rate limit
+        time.sleep(delay)
+
+def start_geolocation_worker():
+    """Starts the batch worker thread once per process. Caller must hold _geo_lock."""
+    global _geo_worker
+    if _geo_worker is None:
+        _geo_worker = threading.Thread(target=geolocation_batch_worker, daemon=True)
+        _geo_worker.start()
+
+def get_geolocations(ip_addresses, timeout=GEO_WAIT_TIMEOUT):
+    """
+    Returns {ip: (country, region, city)} for a set of IP addresses.
+    Uncached IPs are queued together for the batch worker (up to 100 IPs per
+    request) and waited on for at most timeout seconds in total; any still
+    unresolved come back as "Pending". A timeout of None only uses the cache.
+    """
+    locations = {}
+    waiting = {}
+    new_ips = []
+    with _geo_lock:
+        for ip in ip_addresses:
+            if ip in ('127.0.0.1', 'localhost'):
+                locations[ip] = ("N/A", "N/A", "N/A") # localhost/testing
+            elif ip in _geo_cache:
+                _geo_cache.move_to_end(ip)
+                locations[ip] = _geo_cache[ip]
+            elif timeout is None:
+                locations[ip] = ("Pending", "Pending", "Pending")
+            else:
+                event = _geo_pending.get(ip)
+                if event is None:
+                    event = threading.Event()
+                    _geo_pending[ip] = event
+                    new_ips.append(ip)
+                waiting[ip] = event
+        if new_ips:
+            start_geolocation_worker()
+            _geo_queue.put(new_ips)
+
+    if not waiting:
+        return locations
+
+    deadline = time.monotonic() + timeout
+    for event in waiting.values():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        event.wait(remaining)
+
+    with _geo_lock:
+        for ip, event in waiting.items():
+            if ip in _geo_cache:
+                locations[ip] = _geo_cache[ip]
+            elif event.is_set():
+                locations[ip] = ("GeoIP-Failed", "GeoIP-Failed", "GeoIP-Failed")
+            else:
+                locations[ip] = ("Pending", "Pending", "Pending")
+    return locations
 
 def log_flask_request(request, response):
-    """Logs the details of the incoming Flask HTTP request to the LOG_FILE."""
-    if os.path.getsize(LOG_OVERFLOW) >= MAX_OVERFLOW_SIZE:
+    """Queues the details of the incoming Flask HTTP request for the background log writer."""
+    # Drop static assets and bots before doing any other work
+    url = request.full_path
+    if is_static_asset(url):
         return
-    
-    log_file = LOG_FILE
-    if os.path.getsize(LOG_FILE) >= MAX_LOG_SIZE:
-        log_file = LOG_OVERFLOW
-    
+
+    user_agent = request.headers.get('User-Agent', 'N/A')
+    if is_bot(user_agent):
+        return
+
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     method = request.method
-    url = request.full_path
     referrer = request.headers.get('Referer', 'N/A')
-    user_agent = request.headers.get('User-Agent', 'N/A')
 
     # Flask should extract the true IP even through Nginx proxy
     ip = request.remote_addr 
@@ -140,54 +369,238 @@ def log_flask_request(request, response):
     if ip is None:
         ip = "Unknown IP"
 
-    if is_static_asset(url):
+    enqueue_log('request', {
+        'timestamp': timestamp,
+        'ip': ip,
+        'referrer': referrer,
+        'method': method,
+        'url': url,
+        'user_agent': user_agent
+    })
+
+def format_log_entry(record, location):
+    """Formats the log line for a queued request and its (country, region, city)."""
+    country, region, city = location
+    return LOG_FORMAT.format(country=country, region=region, city=city, **record)
+
+class LogFile:
+    """
+    Append-only log file with an in-memory write buffer.
+    Buffered lines go out in one os.write on an O_APPEND descriptor, so
+    batches from different workers never interleave mid-line.
+    The size is tracked in-process and only re-read from disk by sync(), which
+    also reopens the file if it was archived (possibly by another worker).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.buffer = bytearray()
+        self.size = 0
+
+    def open(self):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self.size = os.fstat(self.fd).st_size + len(self.buffer)
+
+    def get_size(self):
+        self.open()
+        return self.size
+
+    def write(self, data):
+        self.open()
+        self.buffer += data
+        self.size += len(data)
+        if len(self.buffer) >= LOG_WRITE_BUFFER_SIZE:
+            self.sync()
+
+    def flush(self):
+        if self.fd is None or not self.buffer:
+            return
+        view = memoryview(self.buffer)
+        try:
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+        finally:
+            remaining = bytes(view)
+            view.release()
+            self.buffer = bytearray(remaining)
+
+    def sync(self):
+        """
+        Moves to the new file if the log was archived (possibly by another
+        worker), then flushes buffered lines and picks up writes from other processes.
+        Checking first keeps buffered lines out of an archive that was already sent.
+        """
+        if self.fd is None:
+            return
+        try:
+            archived = os.stat(self.path).st_ino != os.fstat(self.fd).st_ino
+        except FileNotFoundError:
+            archived = True
+        if archived:
+            os.close(self.fd)
+            self.fd = None
+            self.open()
+        self.flush()
+        self.size = os.fstat(self.fd).st_size
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                self.flush()
+            finally:
+                os.close(self.fd)
+                self.fd = None
+
+def get_log_handle(path):
+    """Returns the shared LogFile for a path."""
+    if path not in _log_files:
+        _log_files[path] = LogFile(path)
+    return _log_files[path]
+
+def write_request_log(data):
+    """Appends data to LOG_FILE, or LOG_OVERFLOW once LOG_FILE is full."""
+    overflow_file = get_log_handle(LOG_OVERFLOW)
+    if overflow_file.get_size() >= MAX_OVERFLOW_SIZE:
         return
 
-    if is_bot(user_agent):
+    log_file = get_log_handle(LOG_FILE)
+    if log_file.get_size() >= MAX_LOG_SIZE:
+        log_file = overflow_file
+    log_file.write(data)
+
+def write_error_log(data):
+    """Appends data to ERROR_LOG_FILE unless it is full."""
+    log_file = get_log_handle(ERROR_LOG_FILE)
+    if log_file.get_size() >= MAX_LOG_SIZE:
         return
+    log_file.write(data)
 
-    country, region, city = get_geolocation(ip)
-    
-    log_entry = LOG_FORMAT.format(
-        timestamp=timestamp,
-        ip=ip,
-        country=country,
-        region=region,
-        city=city,
-        referrer=referrer,
-        method=method,
-        url=url,
-        user_agent=user_agent
-    )
-    
+def sync_logs():
+    """Flushes every open log handle and refreshes its state from disk."""
+    with _log_writer_lock:
+        for log_file in _log_files.values():
+            try:
+                log_file.sync()
+            except OSError as e:
+                print(f"Error flushing log file {log_file.path}: {e}", file=sys.stderr)
+
+def close_logs():
+    """Flushes and closes every open log handle."""
+    with _log_writer_lock:
+        for log_file in _log_files.values():
+            log_file.close()
+
+def drain_log_queue(batch):
+    """Appends every line currently queued to batch without blocking."""
+    while True:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            return batch
+
+def write_log_batch(batch, geo_timeout=GEO_WAIT_TIMEOUT):
+    """Formats a batch of queued lines and writes it with a single write per file."""
+    # Resolve every new IP in the batch with one wait rather than one per line
+    records = [item for kind, item in batch if kind == 'request']
+    locations = get_geolocations({item['ip'] for item in records}, geo_timeout)
+    request_lines = [format_log_entry(item, locations[item['ip']]) + "\n" for item in records]
+    error_lines = [item + "\n" for kind, item in batch if kind == 'error']
+    with _log_writer_lock:
+        try:
+            if request_lines:
+                write_request_log("".join(request_lines).encode('utf-8'))
+            if error_lines:
+                write_error_log("".join(error_lines).encode('utf-8'))
+        except OSError as e:
+            print(f"Error writing to log file: {e}", file=sys.stderr)
+
+def log_writer():
+    """
+    Drains queued log lines and writes each batch with a single write per file.
+    Buffered lines are synced to disk at most LOG_FLUSH_INTERVAL seconds apart.
+    """
+    last_sync = time.monotonic()
+    while True:
+        try:
+            batch = [_log_queue.get(timeout=LOG_FLUSH_INTERVAL)]
+        except queue.Empty:
+            batch = []
+        write_log_batch(drain_log_queue(batch))
+
+        if not batch or time.monotonic() - last_sync >= LOG_FLUSH_INTERVAL:
+            report_dropped_lines()
+            sync_logs()
+            last_sync = time.monotonic()
+
+def start_log_writer():
+    """Starts the log writer thread once per process."""
+    global _log_writer
+    if _log_writer is not None:
+        return
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = threading.Thread(target=log_writer, daemon=True)
+            _log_writer.start()
+
+def enqueue_log(kind, item):
+    """Hands a line to the log writer without blocking; drops it if the queue is full."""
+    global _dropped_lines
+    start_log_writer()
     try:
-        with open(log_file, 'a') as f:
-            f.write(log_entry + "\n")
-    except IOError as e:
-        print(f"Error writing to log file {log_file}: {e}", file=sys.stderr)
+        _log_queue.put_nowait((kind, item))
+    except queue.Full:
+        with _dropped_lock:
+            _dropped_lines += 1
+
+def report_dropped_lines():
+    """Records in the error log how many lines were dropped since the last report."""
+    global _dropped_lines
+    with _dropped_lock:
+        dropped, _dropped_lines = _dropped_lines, 0
+    if dropped:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with _log_writer_lock:
+            try:
+                write_error_log(f"[{timestamp}] Log queue full, dropped {dropped} lines\n".encode('utf-8'))
+            except OSError as e:
+                print(f"Error writing to log file: {e}", file=sys.stderr)
+
+def shutdown_logs():
+    """Writes out lines still queued at exit (without new GeoIP lookups) and closes the logs."""
+    write_log_batch(drain_log_queue([]), geo_timeout=None)
+    report_dropped_lines()
+    close_logs()
+
+atexit.register(shutdown_logs)
 
 def archive_logs(log_type='requests'):
     target_file = get_log_file_path(log_type)
     
-    if os.path.exists(target_file):
-        # Create unique filename
-        prefix = "errors" if log_type == 'error' else "requests"
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        archive_filename = f"{prefix}_archive_{timestamp}.log"
-        archive_path = os.path.join(os.path.dirname(target_file), archive_filename)
-        
-        try:
+    # Create unique filename
+    prefix = "errors" if log_type == 'error' else "requests"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    archive_filename = f"{prefix}_archive_{timestamp}.log"
+    archive_path = os.path.join(os.path.dirname(target_file), archive_filename)
+    
+    try:
+        with _log_writer_lock:
+            # Close our handle so buffered lines land in the archive
+            get_log_handle(target_file).close()
+
             # Rename the current log file
             os.rename(target_file, archive_path)
-            
+
             # Create a new empty log file immediately so logging can continue
             with open(target_file, 'w'): 
                 pass
-                
-            return archive_path, archive_filename
             
-        except OSError as e:
-            log_error_to_file(f"OSError during log archive: {e}")
-            return None, None
-            
-    return None, None
\ No newline at end of file
+        return archive_path, archive_filename
+
+    except FileNotFoundError:
+        return None, None
+    except OSError as e:
+        log_error_to_file(f"OSError during log archive: {e}")
+        return None, None
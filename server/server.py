@@ -1,18 +1,34 @@
+import base64
 import functools
+import hmac
+import json
+import mimetypes
 import os
 import sys
+from urllib.parse import quote
 from dotenv import load_dotenv
 from . import logger
 from flask import Flask, request, jsonify, make_response, send_from_directory, abort, render_template, send_file, after_this_request
 from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.utils import safe_join
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
 
 RESOURCE_PREFIX = "resources"
 ADMIN_PREFIX = "admin_pages"
+
+# Absolute directories, resolved once
+STATIC_DIR = os.path.abspath(os.path.join(PROJECT_ROOT, "site/public"))
+RESOURCE_DIR = os.path.abspath(os.path.join(PROJECT_ROOT, RESOURCE_PREFIX))
+LOGS_DIR = os.path.abspath(os.path.join(PROJECT_ROOT, "logs"))
 ERROR_TEMPLATE = "error.html"
 
+# Internal nginx locations used for X-Accel-Redirect (see README)
+ACCEL_SITE_PREFIX = "/_accel/site"
+ACCEL_RESOURCE_PREFIX = "/_accel/resources"
+ACCEL_LOGS_PREFIX = "/_accel/logs"
+
 INDEX_FILE = "LMGGC.html"
 LOGS_TEMPLATE = "logs.html.jinja"
 ERROR_TEMPLATE = "error.html.jinja"
@@ -21,39 +37,138 @@ ERROR_TEMPLATE = "error.html.jinja"
 load_dotenv()
 USERNAME = os.getenv("ADMIN_USER")
 PASSWORD = os.getenv("ADMIN_PASS")
+# Let nginx send files itself via X-Accel-Redirect (requires the nginx locations)
+X_ACCEL_REDIRECT = os.getenv("X_ACCEL_REDIRECT", "").lower() in ("1", "true", "yes")
+
+# Expected Authorization header, built once (None disables the admin pages)
+EXPECTED_AUTH = None
+if USERNAME is not None and PASSWORD is not None:
+    EXPECTED_AUTH = b"Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode('utf-8'))
+
+# Pre-encoded JSON bodies for /api/ error responses
+API_ERROR_BODIES = {
+    code: json.dumps({'error': message, 'code': code}).encode('utf-8')
+    for code, message in ((404, "Not Found"), (500, "Internal Server Error"))
+}
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+RESOURCE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# /api/logs/stats body with a slot for the only value that changes
+STATS_TEMPLATE = b'{"size": %d, "max_size": ' + str(logger.MAX_LOG_SIZE).encode('ascii') + b'}'
+
+# Pre-encoded 401 response parts
+AUTH_FAIL_BODY = b"Access denied: Authentication required."
+AUTH_FAIL_HEADERS = {
+    'WWW-Authenticate': 'Basic realm="Restricted Logs"',
+    'Content-Type': 'text/plain; charset=utf-8'
+}
 
 # --- Flask App Initialization ---
 app = Flask(__name__, 
-            static_folder=os.path.join(PROJECT_ROOT, "site/public"),
+            static_folder=STATIC_DIR,
             template_folder=os.path.join(PROJECT_ROOT, ADMIN_PREFIX))
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
-@app.before_request
 def setup_logs():
-    """Ensure log directories exist before the first request."""
-    os.makedirs(os.path.join(PROJECT_ROOT, "logs"), exist_ok=True)
+    """Ensure log directories and files exist. Runs once per process at import."""
+    os.makedirs(LOGS_DIR, exist_ok=True)
     log_files = [logger.LOG_FILE, logger.ERROR_LOG_FILE, logger.LOG_OVERFLOW]
     for file_path in log_files:
-        if not os.path.exists(file_path):
-            with open(file_path, 'a'):
-                pass
+        # Append mode creates missing files and leaves existing ones untouched
+        with open(file_path, 'a'):
+            pass
+
+setup_logs()
 
 # --- Helper Functions ---
 
 def check_auth():
     """Checks for Basic Auth headers. Returns True if authorized."""
-    auth = request.authorization
-    if auth and auth.username == USERNAME and auth.password == PASSWORD:
-        return True
-    return False
+    if EXPECTED_AUTH is None:
+        return False
+    auth_header = request.headers.get('Authorization', '').encode('latin-1')
+    return hmac.compare_digest(auth_header, EXPECTED_AUTH)
+
+@functools.lru_cache(maxsize=None)
+def read_cached_file(path):
+    """Returns a file's contents, reading it from disk only on first use."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+@functools.lru_cache(maxsize=None)
+def render_cached_template(template_name):
+    """Renders a template without context once and reuses the output."""
+    return render_template(template_name)
+
+@functools.lru_cache(maxsize=None)
+def render_error_page(code, message):
+    """Renders the error template once per (code, message) and reuses the output."""
+    return app.jinja_env.get_template(ERROR_TEMPLATE).render(code=code, message=message)
+
+@app.template_global()
+def resource_url(filename):
+    """Returns the URL of a resource with its modification time as a cache-busting version."""
+    version = int(os.path.getmtime(os.path.join(RESOURCE_DIR, filename)))
+    return f"/{RESOURCE_PREFIX}/{quote(filename)}?v={version:x}"
+
+@functools.lru_cache(maxsize=256)
+def has_precompressed(filename):
+    """True if deploy.py generated a gzip copy of the resource."""
+    gz_path = safe_join(RESOURCE_DIR, filename + '.gz')
+    return gz_path is not None and os.path.isfile(gz_path)
+
+def use_precompressed(filename):
+    """
+    True if the resource's gzip copy can be served. Deploys regenerate stale
+    copies before restarting, so only the dev server, where resources are
+    edited while it runs, checks that the copy is at least as new as the file.
+    """
+    if not app.debug:
+        return has_precompressed(filename)
+    path = safe_join(RESOURCE_DIR, filename)
+    if path is None:
+        return False
+    try:
+        return os.path.getmtime(path + '.gz') >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+def send_precompressed(filename):
+    """Sends the deploy-time gzip copy of a resource to clients that accept it."""
+    if not request.accept_encodings['gzip']:
+        response = send_from_directory(RESOURCE_DIR, filename)
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(RESOURCE_DIR, filename + '.gz', mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def send_accelerated(directory, filename, accel_prefix, mimetype=None):
+    """
+    Sends a file from directory. With X_ACCEL_REDIRECT enabled, responds with
+    just an X-Accel-Redirect header so nginx serves the file with sendfile.
+    """
+    if not X_ACCEL_REDIRECT:
+        return send_from_directory(directory, filename, mimetype=mimetype)
+
+    file_path = safe_join(directory, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return make_response('', 200, {
+        'X-Accel-Redirect': f"{accel_prefix}/{quote(filename)}",
+        'Content-Type': mimetype
+    })
 
 def requires_auth(f):
     """Decorator to enforce Basic Authentication."""
     @functools.wraps(f)
     def decorated(*args, **kwargs):
         if not check_auth():
-            return make_response('Access denied: Authentication required.', 401, 
-                                 {'WWW-Authenticate': 'Basic realm="Restricted Logs"'})
+            return make_response(AUTH_FAIL_BODY, 401, AUTH_FAIL_HEADERS)
         return f(*args, **kwargs)
     return decorated
 
@@ -62,33 +177,50 @@ def requires_auth(f):
 # Static Files
 @app.route('/')
 def index():
-    return send_from_directory(str(app.static_folder), INDEX_FILE)
+    return send_accelerated(STATIC_DIR, INDEX_FILE, ACCEL_SITE_PREFIX)
 
 @app.route('/<path:filename>')
 def serve_public_files(filename):
-    return send_from_directory(str(app.static_folder), filename)
+    return send_accelerated(STATIC_DIR, filename, ACCEL_SITE_PREFIX)
 
 # Resources (CSS/JS/Images from PROJECT_ROOT/resources/)
 @app.route(f'/{RESOURCE_PREFIX}/<path:filename>')
 def serve_resources(filename):
     """Serves files from the project root's resources/ directory."""
     try:
-        resource_path = os.path.join(PROJECT_ROOT, RESOURCE_PREFIX)
-        return send_from_directory(resource_path, filename)
+        if not X_ACCEL_REDIRECT and use_precompressed(filename):
+            response = send_precompressed(filename)
+        else:
+            response = send_accelerated(RESOURCE_DIR, filename, ACCEL_RESOURCE_PREFIX)
     except FileNotFoundError:
         abort(404)
 
+    # Versioned URLs change whenever the file does, so browsers may keep them forever
+    if request.args.get('v'):
+        response.headers['Cache-Control'] = RESOURCE_CACHE_CONTROL
+    return response
+
 # Favicon
 @app.route('/favicon.ico')
 def favicon():
-
-    return serve_resources('favicon.png')
+    """Serves the favicon from memory and lets browsers cache it for a day."""
+    try:
+        content = read_cached_file(os.path.join(RESOURCE_DIR, 'favicon.png'))
+    except FileNotFoundError:
+        abort(404)
+    return make_response(content, 200, {
+        'Content-Type': 'image/png',
+        'Cache-Control': 'public, max-age=86400'
+    })
 
 # Logs Page (Requires Auth)
 @app.route('/logs')
 @requires_auth
 def logs_page():
-    return render_template(LOGS_TEMPLATE)
+    # The dev server re-renders so edited resources get a new ?v= version
+    if app.debug:
+        return render_template(LOGS_TEMPLATE)
+    return render_cached_template(LOGS_TEMPLATE)
 
 # API Endpoints (Requires Auth)
 @app.route('/api/logs/<log_file>')
@@ -99,8 +231,7 @@ def api_log_file(log_file):
         abort(404)
     
     # Serve the file directly from the logs/ directory
-    log_path = os.path.join(PROJECT_ROOT, 'logs')
-    return send_from_directory(log_path, log_file, mimetype='text/plain')
+    return send_accelerated(LOGS_DIR, log_file, ACCEL_LOGS_PREFIX, mimetype='text/plain')
 
 @app.route('/api/logs/stats')
 @requires_auth
@@ -108,10 +239,7 @@ def api_log_stats():
     log_type = request.args.get('type', 'requests')
     try:
         current_size = logger.get_log_size(log_type)
-        return jsonify({
-            'size': current_size, 
-            'max_size': logger.MAX_LOG_SIZE
-        })
+        return make_response(STATS_TEMPLATE % current_size, 200, JSON_HEADERS)
     except Exception as e:
         app.logger.error(f"Failed to fetch log stats: {e}")
         return jsonify({'error': f"Failed to fetch log stats: {e}", 'code': 500}), 500
@@ -121,8 +249,11 @@ def api_log_stats():
 def api_log_search():
     log_type = request.args.get('type', 'requests')
     search_term = request.args.get('q', '')
+    # Optional byte window: scan back from offset over the last tail bytes, whole lines only
+    tail = request.args.get('tail', type=int)
+    offset = request.args.get('offset', type=int)
     try: 
-        results = logger.search_logs(search_term, log_type)
+        results = logger.search_logs(search_term, log_type, tail=tail, offset=offset)
         return jsonify(results)
     except Exception as e:
         app.logger.error(f"Log search failed: {e}")
@@ -159,6 +290,8 @@ def api_log_archive():
 @app.after_request
 def log_all_requests(response):
     """Logs details of every request after it has been processed by the app."""
+    # Never read response.data here: it would buffer send_file responses into
+    # memory and bypass the WSGI server's file_wrapper
     if response.status_code == 404:
         # logged in errors.log instead (likely bots)
         return response
@@ -176,9 +309,10 @@ def log_all_requests(response):
 @app.errorhandler(404)
 def page_not_found(error):
     logger.log_error_to_file(f"HTTP Error 404 (Not Found): {request.path}")
+    if request.path.startswith('/api/'):
+        return make_response(API_ERROR_BODIES[404], 404, JSON_HEADERS)
     try:
-        return make_response(app.jinja_env.get_template(ERROR_TEMPLATE).render(
-            code=404, message="Not Found"), 404)
+        return make_response(render_error_page(404, "Not Found"), 404)
     except Exception:
         return make_response("<h1>404 Not Found</h1>", 404)
 
@@ -186,9 +320,10 @@ def page_not_found(error):
 @app.errorhandler(500)
 def internal_server_error(error):
     logger.log_error_to_file(f"HTTP Error 500 (Internal Server Error): {request.path}")
+    if request.path.startswith('/api/'):
+        return make_response(API_ERROR_BODIES[500], 500, JSON_HEADERS)
     try:
-        return make_response(app.jinja_env.get_template(ERROR_TEMPLATE).render(
-            code=500, message="Internal Server Error"), 500)
+        return make_response(render_error_page(500, "Internal Server Error"), 500)
     except Exception:
         return make_response("<h1>500 Internal Server Error</h1>", 500)
 